@@ -1,5 +1,7 @@
 from pathlib import Path
 import sys
+import time
+_T0 = time.perf_counter()
 
 ROOT = Path(__file__).resolve().parents[1]  # project root
 if str(ROOT) not in sys.path:
@@ -7,44 +9,85 @@ if str(ROOT) not in sys.path:
 
 import streamlit as st
 import pandas as pd
-from src.data_ingestion import build_dataset, PROCESSED
+from src.data_ingestion import COHORT_INDEX
+from src.dataset_store import SharedDataset
+from src.browser import DataBrowser
+from src.cohort import load_or_build
 from src.eda import describe, plot_hist, plot_scatter
-from src.models import train_classifier, train_regressor, train_cluster
+# src.models keeps sklearn and joblib behind function-level imports, so this only
+# costs anything once a model is scored; training and importance run in job workers.
+from src.models import REGRESSOR_ENGINES, MODELS_DIR, default_features, saved_features
+from src.jobs import JobManager, IN_FLIGHT
+from src.startup import loaded_heavy_modules
 
 st.set_page_config(page_title="BI Exam Prototype", layout="wide")
 st.title("BI/AI Exam – Student Performance")
 
-@st.cache_data
-def get_df():
-    try:
-        df = pd.read_csv(PROCESSED / "dataset_clean.csv")
-    except FileNotFoundError:
-        df = build_dataset()
-    return df
+# One read-only, memory-mapped copy of the processed table shared by every session;
+# swapped automatically when dataset_clean.csv is rebuilt
+@st.cache_resource
+def get_store() -> SharedDataset:
+    return SharedDataset()
+
+@st.cache_resource
+def get_cohort_index(fingerprint: str, _df: pd.DataFrame):
+    return load_or_build(_df, COHORT_INDEX, fingerprint)
 
-df = get_df()
+fingerprint, df_all = get_store().get()
+cohort_index = get_cohort_index(fingerprint, df_all)
+
+# ---- Cohort filter: everything below (plots, models) works on the filtered view
+cohort = st.text_input("Cohort filter", "", placeholder="e.g. school_MS=1 & higher_yes=1 & failures>0",
+                       help="col OP number with = != > >= < <=, combined with & | ~ and parentheses")
+cohort_rows = None  # row positions of the cohort in df_all (None = everyone)
+try:
+    if cohort.strip():
+        cohort_rows = cohort_index.rows(cohort)
+except (KeyError, ValueError) as e:
+    st.warning(f"Cohort filter ignored: {e}")
+    cohort = ""
+df = df_all if cohort_rows is None else df_all.iloc[cohort_rows]
+if cohort.strip():
+    st.caption(f"Cohort: {len(df)} of {len(df_all)} students")
+if df.empty:
+    st.warning("No students match this cohort.")
+    st.stop()
 
 # Heuristics for default targets & features (Student Performance)
-all_cols = df.columns.tolist()
 default_class_target = "Pass" if "Pass" in df.columns else None
 default_reg_target = "G3" if "G3" in df.columns else None
 
-# Try a small sensible numeric feature set commonly present in student datasets
-candidate_features = [c for c in ["age", "studytime", "failures", "absences", "Medu", "Fedu"] if c in df.columns]
-# Add one-hot columns that are likely present
-candidate_features += [c for c in all_cols if c.startswith("sex_") or c.startswith("address_") or c.startswith("famsize_")]
+candidate_features = default_features(df)
 
-# Fallback to any numeric columns if the above are missing
-if len(candidate_features) < 4:
-    candidate_features = df.select_dtypes(include=["number", "bool", "int", "float"]).columns.tolist()
-    # Don't include targets as features
-    candidate_features = [c for c in candidate_features if c not in {"Pass", "G3"}]
+# ---- Paged browser: sorting and paging happen server-side on the shared table,
+# only the requested page and columns are sent to the browser
+@st.cache_resource
+def get_browser(fingerprint: str, _df: pd.DataFrame, _index) -> DataBrowser:
+    return DataBrowser(_df, _index)
+
+@st.cache_data
+def get_describe(fingerprint: str, cohort: str, _df: pd.DataFrame) -> pd.DataFrame:
+    return describe(_df)
 
 st.subheader("Data Preview")
-st.dataframe(df.head(20))
+browser = get_browser(fingerprint, df_all, cohort_index)
+cp1, cp2, cp3, cp4 = st.columns([3, 2, 1, 1])
+show_cols = cp1.multiselect("Columns", df_all.columns.tolist(), default=[], placeholder="All columns")
+sort_by = cp2.selectbox("Sort by", ["(row order)"] + df_all.columns.tolist())
+descending = cp3.checkbox("Descending")
+page_size = cp4.selectbox("Rows / page", [20, 50, 100, 500], index=0)
+n_total = browser.n_rows(cohort_rows)
+n_pages = max(1, -(-n_total // page_size))
+page_no = st.number_input(f"Page (of {n_pages})", 1, n_pages, 1)
+page_df = browser.page(page_no - 1, page_size, show_cols or None,
+                       sort_by=None if sort_by == "(row order)" else sort_by,
+                       ascending=not descending, rows=cohort_rows)
+st.dataframe(page_df)
+first = (page_no - 1) * page_size
+st.caption(f"Rows {first + 1}–{first + len(page_df)} of {n_total}")
 
 with st.expander("Descriptive Statistics"):
-    st.dataframe(describe(df))
+    st.dataframe(get_describe(fingerprint, cohort, df))
 
 st.subheader("Quick Plots")
 cols = list(df.columns)
@@ -84,8 +127,72 @@ with c_bar:
     fig_bar = bar_mean_g3_by(df, by_col=by)
     st.pyplot(fig_bar)
 
+def show_importance(artifact: str, target: str, key: str):
+    # Runs as a background job, within the same worker limit and core budget as training
+    with st.expander("Feature importance (permutation)"):
+        ci1, ci2 = st.columns(2)
+        sample = ci1.number_input("Sample rows", 100, 1_000_000, 2000, step=500, key=f"{key}_n")
+        repeats = ci2.slider("Repeats", 1, 20, 5, key=f"{key}_r")
+        if st.button("Compute importance", key=f"{key}_btn"):
+            submit_job("importance", df, target, artifact=artifact, n_repeats=repeats,
+                       sample_size=int(sample), ids_key=f"{key}_jobs")
+        jobs_panel(("importance",), ids_key=f"{key}_jobs")
+
+# ---- Training runs as background jobs; one manager (and worker limit) for all sessions
+@st.cache_resource
+def get_jobs() -> JobManager:
+    return JobManager()
+
+jobs = get_jobs()
+
+def submit_job(kind: str, *args, ids_key: str = "job_ids", **kwargs):
+    # ids_key: the session list the job is shown under (one per panel)
+    job_id = jobs.submit(kind, *args, **kwargs)
+    ids = st.session_state.setdefault(ids_key, [])
+    if job_id not in ids:
+        ids.append(job_id)
+
+def _in_flight(kinds: tuple, ids_key: str = "job_ids") -> bool:
+    return any(job is not None and job["kind"] in kinds and job["state"] in IN_FLIGHT
+               for job in map(jobs.get, st.session_state.get(ids_key, [])))
+
+def _jobs_panel(kinds: tuple, polling: bool = False, ids_key: str = "job_ids"):
+    for job_id in reversed(st.session_state.get(ids_key, [])):
+        job = jobs.get(job_id)
+        if job is None or job["kind"] not in kinds:
+            continue
+        label = f"{job['kind']} · {job['state']}" + (f" · {job['stage']}" if job["stage"] else "")
+        with st.container():
+            cj1, cj2 = st.columns([4, 1])
+            cj1.write(f"**{label}** ({job['elapsed']} s)")
+            if job["state"] in IN_FLIGHT and cj2.button("Cancel", key=f"cancel_{job_id}"):
+                jobs.cancel(job_id)
+            if job["stage_seconds"]:
+                cj1.caption(" · ".join(f"{k}: {v}s" for k, v in job["stage_seconds"].items()))
+            if job["state"] == "done":
+                if job["kind"] == "importance":
+                    st.bar_chart(job["result"]["importance_mean"])
+                if isinstance(job["result"], pd.DataFrame):
+                    st.dataframe(job["result"])
+                else:
+                    st.success(job["result"])
+            elif job["error"]:
+                st.error(job["error"])
+    if polling and not _in_flight(kinds, ids_key):
+        st.rerun()  # last job finished: redraw the page once, which stops the polling
+
+def jobs_panel(kinds: tuple, ids_key: str = "job_ids"):
+    # Poll job status without rerunning the whole page, where Streamlit supports
+    # fragments, and only while this session has a job of these kinds in flight
+    if not hasattr(st, "fragment"):
+        return _jobs_panel(kinds, ids_key=ids_key)
+    polling = _in_flight(kinds, ids_key)
+    st.fragment(run_every=1.0 if polling else None)(_jobs_panel)(kinds, polling, ids_key)
+
 st.subheader("Models")
-t1, t2, t3 = st.tabs(["Classification", "Regression", "Clustering"])
+st.caption("Training jobs: {running} running, {queued} queued (limit {max_workers}, "
+           "{cpus_per_job} cores each)".format(**jobs.stats()))
+t1, t2, t3, t4 = st.tabs(["Classification", "Regression", "Clustering", "What-if"])
 
 with t1:
     st.write("Binary classification (default: Pass)")
@@ -93,7 +200,9 @@ with t1:
     target = st.selectbox("Target (binary/class)", df.columns.tolist(), index=(df.columns.get_loc(default_class_target) if default_class_target in df.columns else 0))
     if st.button("Train Classifier"):
         use = df.dropna(subset=list(set(features + [target])))
-        st.success(train_classifier(use, features, target))
+        submit_job("classifier", use, features, target)
+    jobs_panel(("classifier",))
+    show_importance("classifier.joblib", target, key="imp_clf")
 
 with t2:
     st.write("Regression (default: G3 final grade)")
@@ -101,9 +210,18 @@ with t2:
     # default to G3 where available
     idx = (df.columns.get_loc(default_reg_target) if default_reg_target in df.columns else 0)
     target_r = st.selectbox("Target (numeric)", df.columns.tolist(), index=idx, key="regt")
-    if st.button("Train Regressor"):
+    engine = st.selectbox("Engine", list(REGRESSOR_ENGINES), index=0, key="rege",
+                          help="tree = single decision tree; hist_gb = histogram gradient boosting "
+                               "(binned, multi-threaded, early stopping); random_forest = parallel forest")
+    cr1, cr2 = st.columns(2)
+    if cr1.button("Train Regressor"):
         use = df.dropna(subset=list(set(features_r + [target_r])))
-        st.success(train_regressor(use, features_r, target_r))
+        submit_job("regressor", use, features_r, target_r, engine=engine)
+    if cr2.button("Compare engines"):
+        use = df.dropna(subset=list(set(features_r + [target_r])))
+        submit_job("compare_regressors", use, features_r, target_r)
+    jobs_panel(("regressor", "compare_regressors"))
+    show_importance("regressor.joblib", target_r, key="imp_reg")
 
 with t3:
     st.write("KMeans clustering")
@@ -111,6 +229,63 @@ with t3:
     k = st.slider("k", 2, 10, 3)
     if st.button("Train Cluster"):
         use = df.dropna(subset=features_c)
-        st.success(train_cluster(use, features_c, k))
+        submit_job("cluster", use, features_c, k)
+    jobs_panel(("cluster",))
+
+@st.cache_resource
+def get_saved_models(mtimes: tuple):
+    from src.whatif import load_models
+    return load_models()
+
+with t4:
+    st.write("What-if: score the current cohort under feature changes with the saved models")
+    # Feature names come from the sidecars written next to the artifacts; the models
+    # themselves (and sklearn) are only loaded when scenarios are scored
+    model_paths = [MODELS_DIR / "classifier.joblib", MODELS_DIR / "regressor.joblib"]
+    mtimes = tuple(p.stat().st_mtime if p.exists() else None for p in model_paths)
+    sidecars = [saved_features(p.name) for p in model_paths]
+    if any(p.exists() and f is None for p, f in zip(model_paths, sidecars)):
+        # Artifact saved without a feature list: read it from the model, on request
+        if st.checkbox("Load saved models to list their features", key="wi_load"):
+            sidecars = [list(getattr(m, "feature_names_in_", [])) for m in get_saved_models(mtimes)]
+    model_feats = list(dict.fromkeys(f for feats in sidecars for f in (feats or [])))
+    if not model_feats:
+        st.info("Load the saved models above, or train a classifier or regressor first."
+                if any(mtimes) else "Train a classifier or regressor first.")
+    else:
+        vary = st.multiselect("Features to vary", model_feats,
+                              default=[c for c in ["studytime", "absences", "failures"] if c in model_feats])
+        options = {}
+        for col in vary:
+            cw1, cw2 = st.columns([1, 2])
+            op = cw1.selectbox(f"{col}: change", ["add", "mul", "set"], key=f"wi_op_{col}",
+                               index={"absences": 1, "failures": 2}.get(col, 0))
+            default = {"add": "0, 1", "mul": "1, 0.5", "set": "0"}[op]
+            raw = cw2.text_input(f"{col}: values (comma separated)", default, key=f"wi_v_{col}_{op}")
+            try:
+                options[col] = [(op, float(v)) for v in raw.split(",") if v.strip()]
+            except ValueError:
+                st.warning(f"Values for {col} must be numbers")
+        if options and st.button("Score scenarios"):
+            from src.whatif import feature_bounds, scenario_grid, score_scenarios
+            try:
+                grid = scenario_grid(options)
+                clf_model, reg_model = get_saved_models(mtimes)
+                t0 = time.perf_counter()
+                # Clip to the whole table's valid range, not the cohort's
+                table = score_scenarios(df, grid, clf_model, reg_model,
+                                        bounds=feature_bounds(df_all, model_feats))
+                st.caption(f"{len(grid)} scenarios × {table['students'].iloc[0]} students "
+                           f"in {time.perf_counter() - t0:.2f} s")
+                st.dataframe(table.drop(columns="students"))
+            except (KeyError, ValueError) as e:
+                st.warning(f"What-if error: {e}")
 
 st.caption("Dataset: Student Performance (Maths). Pass = (G3 ≥ 10). Categorical features are one-hot encoded.")
+
+with st.sidebar.expander("Startup"):
+    st.write(f"Script run: {(time.perf_counter() - _T0) * 1000:.0f} ms")
+    st.write("Heavy modules loaded:", ", ".join(loaded_heavy_modules()) or "none")
+    if st.button("Import-time report"):
+        from src.startup import import_report
+        st.dataframe(import_report())
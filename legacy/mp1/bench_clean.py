@@ -0,0 +1,105 @@
+"""
+Benchmark: per-row clean_records vs. the columnar clean_csv engine.
+
+Writes a synthetic people CSV (with the same messiness as people.csv: padded
+text, blank ages, "not available" salaries, bad dates, plus blank lines and
+short or over-long rows), cleans it both ways, checks the outputs are
+identical and prints the timings, both for cleaning alone and for what
+run_pipeline returns on each path. Small hand-written feeds with other parser
+edge cases (whitespace-only lines, repeated or missing header fields, quoted
+newlines) are checked for parity first.
+
+    python legacy/mp1/bench_clean.py --rows 200000
+"""
+
+from __future__ import annotations
+import argparse, os, random, tempfile, time
+
+import matplotlib
+matplotlib.use("Agg")
+
+from etl import load_csv_to_records, clean_records, clean_csv, frame_to_records, run_pipeline
+
+def make_csv(path: str, n: int, seed: int = 0) -> None:
+    rnd = random.Random(seed)
+    names = ["Alice ", " Bob", "Charlie", "Dana", "", "Évan", "  "]
+    ages = ["30", " 25  ", "", "abc", "41", "7", "-3", "٣"]
+    salaries = ["55000", "42,000", "not available", "", "48000.50", "1.2.3", " 61000 "]
+    dates = ["2023-01-15", "2022-10-05", "", "2023-02-30", "2021-07-01T09:30", "yesterday",
+             "1500-01-01", "20240320"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("name,age,email,salary,joined\n")
+        for i in range(n):
+            name = rnd.choice(names)
+            email = f" {name.strip() or 'x'}{i % 5000}@Example.COM " if rnd.random() > 0.1 else ""
+            row = f"\"{name}\",{rnd.choice(ages)},{email},\"{rnd.choice(salaries)}\",{rnd.choice(dates)}"
+            odd = rnd.random()
+            if odd < 0.01:
+                row += ",extra" * rnd.randint(1, 3)  # DictReader files these under key None
+            elif odd < 0.02:
+                row = row.rsplit(",", rnd.randint(1, 4))[0]  # short row: missing fields
+            elif odd < 0.025:
+                row = ",,,,"
+            elif odd < 0.03:
+                row = ""  # blank line: skipped
+            f.write(row + "\n")
+
+# Parser edge cases the synthetic feed does not produce
+EDGE_CASES = {
+    "whitespace_lines": "name,age,email,salary,joined\nA,1,a@x,10,2020-01-01\n   \n\t\nB,2,,,\n",
+    "blank_and_crlf": "name,age,email,salary,joined\r\nA,1,a@x,10,2020-01-01\r\n\r\n\r\nB,2,,,\r\n",
+    "extra_fields": "name,age,email,salary,joined\nA,1,a@x,10,2020-01-01,x,y\nB,2\n",
+    "quoted_newline": "name,age,email,salary,joined\n\"A\n\nB\",1,a@x,10,2020-01-01\n\"\",,,,\n",
+    "duplicate_header": "name,age,age,salary\nA,1,2,10\nB,3\n",
+    "missing_fields": "name,other\nA,1\n,\n",
+    "header_only": "name,age,email,salary,joined\n",
+    "blank_header": "\nname,age\nA,1\n",
+    "empty": "",
+}
+
+def check_edge_cases(tmp: str) -> None:
+    for label, text in EDGE_CASES.items():
+        path = os.path.join(tmp, f"{label}.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        expected = clean_records(load_csv_to_records(path))
+        got = frame_to_records(clean_csv(path, chunksize=2))
+        assert got == expected, f"{label}: columnar {got} != rows {expected}"
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+def main(rows: int, chunksize: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        check_edge_cases(tmp)
+        path = os.path.join(tmp, "people_bench.csv")
+        make_csv(path, rows)
+
+        # Load + clean, up to the structure each path hands on
+        expected, t_rows = _timed(lambda: clean_records(load_csv_to_records(path)))
+        df, t_cols = _timed(clean_csv, path, chunksize=chunksize)
+        records, t_conv = _timed(frame_to_records, df)
+        assert records == expected, "columnar output differs from clean_records"
+
+        # What run_pipeline returns (plots included, same cost on both paths)
+        _, t_run_rows = _timed(run_pipeline, path, tmp)
+        _, t_run_frame = _timed(run_pipeline, path, tmp, columnar=True)
+        _, t_run_recs = _timed(run_pipeline, path, tmp, columnar=True, as_frame=False)
+
+    print(f"edge cases:           {len(EDGE_CASES)} feeds identical")
+    print(f"rows:                 {rows}")
+    print(f"load+clean_records:   {t_rows:.3f} s  -> list[dict]")
+    print(f"clean_csv (columnar): {t_cols:.3f} s  -> DataFrame   ({t_rows / t_cols:.1f}x)")
+    print(f"  + frame_to_records: {t_cols + t_conv:.3f} s  -> list[dict]  ({t_rows / (t_cols + t_conv):.1f}x, identical)")
+    print(f"run_pipeline (rows):  {t_run_rows:.3f} s  -> list[dict]")
+    print(f"run_pipeline (cols):  {t_run_frame:.3f} s  -> DataFrame (default)")
+    print(f"  as_frame=False:     {t_run_recs:.3f} s  -> list[dict]")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    args = ap.parse_args()
+    main(args.rows, args.chunksize)
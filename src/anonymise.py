@@ -0,0 +1,69 @@
+"""Column-wise PII hashing.
+
+Tokens are ``anon_`` + the first 16 hex chars of SHA-256(salt + value), so with
+an empty salt they match ``legacy/mp1/etl.anonymise``. Per column only the
+unique values are hashed; large batches are sharded across a process pool.
+
+Nothing is persisted: a raw-value -> token map on disk would be as sensitive as
+``data/raw`` and is no faster than re-hashing the uniques. Set ``BI_ANON_SALT``
+to a secret: without it tokens are plain SHA-256 of the value, which a
+dictionary of likely names/emails reverses. An unset salt is warned about and
+recorded in the validation report.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+SALT_ENV = "BI_ANON_SALT"
+
+# Below this many values a process pool costs more than it saves
+# (SHA-256 of a short string is ~1 us; pickling the shards is not free)
+PARALLEL_MIN = 500_000
+CHUNK = 100_000
+
+def anonymisation_salt() -> str:
+    """The salt from BI_ANON_SALT; warns when it is unset (tokens are then reversible)."""
+    salt = os.environ.get(SALT_ENV, "")
+    if not salt:
+        warnings.warn(f"{SALT_ENV} is not set: identifiers are hashed without a salt and can be "
+                      "recovered with a dictionary attack", stacklevel=2)
+    return salt
+
+def _hash_chunk(values: list[str], salt: str) -> list[str]:
+    return ["anon_" + hashlib.sha256((salt + v).encode("utf-8")).hexdigest()[:16] for v in values]
+
+def hash_values(values: list[str], salt: str = "", n_jobs: int | None = None) -> list[str]:
+    """Tokens for `values`, in order; sharded over processes for large batches.
+
+    n_jobs None or <= 0 (joblib's -1) means one worker per CPU.
+    """
+    workers = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count() or 1
+    if workers == 1 or len(values) < PARALLEL_MIN:
+        return _hash_chunk(values, salt)
+    chunks = [values[i:i + CHUNK] for i in range(0, len(values), CHUNK)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [t for part in pool.map(_hash_chunk, chunks, repeat(salt)) for t in part]
+
+def anonymise_series(s: pd.Series, salt: str | None = None, n_jobs: int | None = None) -> pd.Series:
+    """Tokens for one column (salt None = from BI_ANON_SALT); missing values stay None."""
+    salt = anonymisation_salt() if salt is None else salt
+    codes, uniques = pd.factorize(s)  # missing -> code -1
+    tokens = hash_values([str(u) for u in uniques], salt, n_jobs)
+    lookup = np.array(tokens + [None], dtype=object)  # index -1 -> None
+    return pd.Series(lookup[codes], index=s.index, name=s.name, dtype=object)
+
+def anonymise_columns(df: pd.DataFrame, columns, salt: str | None = None,
+                      n_jobs: int | None = None) -> pd.DataFrame:
+    """Copy of `df` with `columns` replaced by tokens; missing values stay None."""
+    salt = anonymisation_salt() if salt is None else salt
+    out = df.copy()
+    for col in columns:
+        if col in out.columns:
+            out[col] = anonymise_series(out[col], salt, n_jobs)
+    return out
@@ -0,0 +1,118 @@
+"""Server-side paging and sorting over the shared processed table.
+
+Only the requested page and columns leave the server. Sorting never reorders
+the frame itself; it works on row orders:
+
+- a sort order already known is sliced directly. This covers a column sorted
+  earlier, an ordinal column from the cohort index, or a 0/1 column (zeros then
+  ones, read off its bitmap).
+- a shallow page on an unsorted column uses a partial sort: ``argpartition``
+  finds the cut value, and only the rows in front of it are sorted.
+- a deep page computes the full stable argsort once and caches it for every
+  later request and session.
+
+Ordering matches ``sort_values(kind="stable", na_position="last")``: ties stay in
+row order and missing values go last in both directions. Text columns sort by
+the rank of their values.
+"""
+from __future__ import annotations
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.cohort import CohortIndex
+
+# Partial sort while the rows needed are under 1/PARTIAL_FRACTION of the table
+PARTIAL_FRACTION = 8
+
+class DataBrowser:
+    def __init__(self, df: pd.DataFrame, index: CohortIndex | None = None):
+        self.df = df
+        self.index = index
+        self._orders: dict[tuple[str, bool], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def n_rows(self, rows: np.ndarray | None = None) -> int:
+        return len(self.df) if rows is None else len(rows)
+
+    def _key(self, col: str, ascending: bool) -> np.ndarray:
+        s = self.df[col]
+        if pd.api.types.is_numeric_dtype(s):
+            key = s.to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            # Text (e.g. the hashed id columns): rank of each value among the sorted
+            # uniques, so the numeric paths below apply; missing -> NaN
+            codes, _ = pd.factorize(s, sort=True)
+            key = np.where(codes < 0, np.nan, codes.astype("float64"))
+        return key if ascending else -key  # NaN stays NaN, so it sorts last either way
+
+    def _known_order(self, col: str, ascending: bool) -> np.ndarray | None:
+        cached = self._orders.get((col, ascending))
+        if cached is not None or self.index is None:
+            return cached
+        if col in self.index.bitmaps:
+            ones = np.unpackbits(self.index.bitmaps[col], count=self.index.n_rows).astype(bool)
+            zeros_first = (np.flatnonzero(~ones), np.flatnonzero(ones))
+            return np.concatenate(zeros_first if ascending else zeros_first[::-1])
+        if ascending and col in self.index.sorted_order:
+            order = self.index.sorted_order[col]
+            missing = np.flatnonzero(np.isnan(self.df[col].to_numpy(dtype="float64", na_value=np.nan)))
+            return np.concatenate([order, missing])
+        return None
+
+    def sort_order(self, col: str, ascending: bool = True) -> np.ndarray:
+        """Full stable row order for `col`, computed once and shared."""
+        order = self._known_order(col, ascending)
+        if order is None:
+            order = np.argsort(self._key(col, ascending), kind="stable")
+        with self._lock:
+            self._orders.setdefault((col, ascending), order)
+        return order
+
+    def _partial(self, key: np.ndarray, needed: int) -> np.ndarray | None:
+        # Positions (into key) of the first `needed` rows in stable sorted order
+        kth = key[np.argpartition(key, needed - 1)[needed - 1]]
+        if np.isnan(kth):
+            return None  # page reaches into the missing values; take the full sort
+        less = np.flatnonzero(key < kth)
+        tied = np.flatnonzero(key == kth)[: needed - len(less)]
+        sel = np.concatenate([less, tied])
+        return sel[np.argsort(key[sel], kind="stable")]
+
+    def ordered_rows(self, needed: int, sort_by: str | None = None, ascending: bool = True,
+                     rows: np.ndarray | None = None) -> np.ndarray:
+        """The first `needed` row positions (optionally within `rows`) in sort order."""
+        if sort_by is None:
+            base = np.arange(len(self.df)) if rows is None else rows
+            return base[:needed]
+        total = self.n_rows(rows)
+        needed = min(needed, total)
+        if needed == 0:
+            return np.array([], dtype=np.int64)
+        order = self._known_order(sort_by, ascending)
+        if order is None and needed * PARTIAL_FRACTION < total:
+            key = self._key(sort_by, ascending)
+            local = self._partial(key if rows is None else key[rows], needed)
+            if local is not None:
+                return local if rows is None else rows[local]
+        if order is None:
+            order = self.sort_order(sort_by, ascending)
+        if rows is not None:
+            member = np.zeros(len(self.df), dtype=bool)
+            member[rows] = True
+            order = order[member[order]]
+        return order[:needed]
+
+    def page(self, page: int = 0, page_size: int = 50, columns: list[str] | None = None,
+             sort_by: str | None = None, ascending: bool = True,
+             rows: np.ndarray | None = None) -> pd.DataFrame:
+        """Rows [page*page_size, (page+1)*page_size) with only `columns` materialised."""
+        start = max(page, 0) * page_size
+        picked = self.ordered_rows(start + page_size, sort_by, ascending, rows)[start:]
+        cols = list(self.df.columns) if not columns else columns
+        return self.df.iloc[picked, [self.df.columns.get_loc(c) for c in cols]]
+
+    def top_k(self, col: str, k: int = 10, largest: bool = True, columns: list[str] | None = None,
+              rows: np.ndarray | None = None) -> pd.DataFrame:
+        return self.page(0, k, columns, sort_by=col, ascending=not largest, rows=rows)
@@ -0,0 +1,206 @@
+"""Cohort filtering over the processed (one-hot) table.
+
+Almost every processed column is a 0/1 dummy from ``build_dataset``. For those
+we keep one packed bitmap (1 bit per row, via ``np.packbits``) of the rows where
+the column is 1. Every other numeric column gets a sorted index (sorted values
++ row order), so a range predicate is two ``searchsorted`` calls. A query like
+
+    school_MS=1 & higher_yes=1 & failures>0
+
+becomes bitwise AND/OR/NOT over packed bitmaps, without scanning the frame.
+Supported syntax: ``col OP number`` with OP in = == != > >= < <=, combined
+with ``&``, ``|``, ``~`` and parentheses (``&`` binds tighter than ``|``).
+"""
+from __future__ import annotations
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bits set per byte value, for counting rows in a packed bitmap
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+_OPS = {"==": np.equal, "!=": np.not_equal, ">": np.greater, ">=": np.greater_equal,
+        "<": np.less, "<=": np.less_equal}
+
+_TOKEN = re.compile(r"\s*(?:(?P<num>-?\d+(?:\.\d+)?)|(?P<op>==|!=|>=|<=|=|>|<)"
+                    r"|(?P<name>[A-Za-z_][\w.]*)|(?P<sym>[&|~()]))")
+
+def _tokenize(expr: str) -> list[tuple[str, str]]:
+    tokens, pos = [], 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if m is None or m.end() == pos:
+            raise ValueError(f"Cannot parse cohort filter at: {expr[pos:]!r}")
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+        pos = m.end()
+    return tokens
+
+class CohortIndex:
+    def __init__(self, n_rows: int, bitmaps: dict[str, np.ndarray],
+                 sorted_values: dict[str, np.ndarray], sorted_order: dict[str, np.ndarray],
+                 fingerprint: str | None = None):
+        self.n_rows = n_rows
+        self.bitmaps = bitmaps
+        self.sorted_values = sorted_values  # non-NaN values, ascending
+        self.sorted_order = sorted_order    # row positions matching sorted_values
+        self.fingerprint = fingerprint
+        self._all = np.packbits(np.ones(n_rows, dtype=bool))
+
+    # ---- construction / persistence
+    @classmethod
+    def build(cls, df: pd.DataFrame, fingerprint: str | None = None) -> "CohortIndex":
+        bitmaps, values, orders = {}, {}, {}
+        for col in df.columns:
+            s = df[col]
+            if not (pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s)):
+                continue
+            arr = s.to_numpy(dtype="float64", na_value=np.nan)
+            valid = ~np.isnan(arr)
+            if valid.all() and np.isin(arr, (0.0, 1.0)).all():
+                bitmaps[col] = np.packbits(arr == 1.0)
+            else:
+                order = np.argsort(arr, kind="stable")[: int(valid.sum())]  # NaN sorts last
+                values[col] = arr[order]
+                orders[col] = order.astype(np.int64)
+        return cls(len(df), bitmaps, values, orders, fingerprint)
+
+    def save(self, path: Path) -> None:
+        arrays = {"n_rows": np.array(self.n_rows), "fingerprint": np.array(self.fingerprint or "")}
+        for col, bits in self.bitmaps.items():
+            arrays[f"bit:{col}"] = bits
+        for col in self.sorted_values:
+            arrays[f"val:{col}"] = self.sorted_values[col]
+            arrays[f"ord:{col}"] = self.sorted_order[col]
+        tmp = Path(path).with_suffix(f".tmp{os.getpid()}.npz")  # per process: concurrent builds
+        np.savez_compressed(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CohortIndex":
+        with np.load(path) as z:
+            bitmaps, values, orders = {}, {}, {}
+            for key in z.files:
+                kind, _, col = key.partition(":")
+                if kind == "bit":
+                    bitmaps[col] = z[key]
+                elif kind == "val":
+                    values[col] = z[key]
+                elif kind == "ord":
+                    orders[col] = z[key]
+            return cls(int(z["n_rows"]), bitmaps, values, orders, str(z["fingerprint"]) or None)
+
+    # ---- predicates
+    def columns(self) -> list[str]:
+        return list(self.bitmaps) + list(self.sorted_values)
+
+    def _not(self, bits: np.ndarray) -> np.ndarray:
+        # Mask the padding bits of the last byte back to 0
+        return np.invert(bits) & self._all
+
+    def _from_rows(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def predicate(self, col: str, op: str, value: float) -> np.ndarray:
+        if op == "=":
+            op = "=="
+        if col in self.bitmaps:
+            ones = self.bitmaps[col]
+            hit0, hit1 = _OPS[op](np.array([0.0, 1.0]), value)
+            if hit0 and hit1:
+                return self._all.copy()
+            if hit1:
+                return ones.copy()
+            if hit0:
+                return self._not(ones)
+            return np.zeros_like(ones)
+        if col in self.sorted_values:
+            vals, order = self.sorted_values[col], self.sorted_order[col]
+            if op == "!=":
+                return self._not(self.predicate(col, "==", value))
+            left = np.searchsorted(vals, value, side="left")
+            right = np.searchsorted(vals, value, side="right")
+            lo, hi = {"==": (left, right), ">": (right, len(vals)), ">=": (left, len(vals)),
+                      "<": (0, left), "<=": (0, right)}[op]
+            return self._from_rows(order[lo:hi])
+        raise KeyError(f"Column {col!r} is not indexed")
+
+    def query(self, expr: str) -> np.ndarray:
+        """Packed bitmap of the rows matching `expr` (empty expr = all rows)."""
+        tokens = _tokenize(expr)
+        if not tokens:
+            return self._all.copy()
+        pos = 0
+
+        def peek():
+            return tokens[pos] if pos < len(tokens) else (None, None)
+
+        def take(kind=None, text=None):
+            nonlocal pos
+            tok = peek()
+            if tok[0] is None or (kind and tok[0] != kind) or (text and tok[1] != text):
+                raise ValueError(f"Unexpected token {tok[1]!r} in cohort filter {expr!r}")
+            pos += 1
+            return tok[1]
+
+        def factor():
+            if peek() == ("sym", "~"):
+                take()
+                return self._not(factor())
+            if peek() == ("sym", "("):
+                take()
+                out = disjunction()
+                take("sym", ")")
+                return out
+            col = take("name")
+            op = take("op")
+            return self.predicate(col, op, float(take("num")))
+
+        def conjunction():
+            out = factor()
+            while peek() == ("sym", "&"):
+                take()
+                out = out & factor()
+            return out
+
+        def disjunction():
+            out = conjunction()
+            while peek() == ("sym", "|"):
+                take()
+                out = out | conjunction()
+            return out
+
+        result = disjunction()
+        if pos != len(tokens):
+            raise ValueError(f"Unexpected token {tokens[pos][1]!r} in cohort filter {expr!r}")
+        return result
+
+    def count(self, bits: np.ndarray) -> int:
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+    def rows(self, expr: str) -> np.ndarray:
+        """Row positions matching `expr`, ascending."""
+        return np.flatnonzero(np.unpackbits(self.query(expr), count=self.n_rows))
+
+    def filter(self, df: pd.DataFrame, expr: str) -> pd.DataFrame:
+        if len(df) != self.n_rows:
+            raise ValueError(f"Index covers {self.n_rows} rows but frame has {len(df)}")
+        if not expr.strip():
+            return df
+        return df.iloc[self.rows(expr)]
+
+def load_or_build(df: pd.DataFrame, path: Path, fingerprint: str) -> CohortIndex:
+    """Reuse the index saved at ingestion time if it matches `fingerprint`, else rebuild it."""
+    if Path(path).exists():
+        index = CohortIndex.load(path)
+        if index.fingerprint == fingerprint and index.n_rows == len(df):
+            return index
+    index = CohortIndex.build(df, fingerprint)
+    index.save(path)
+    return index
@@ -1,11 +1,43 @@
+from __future__ import annotations
 from pathlib import Path
+from typing import BinaryIO
 import pandas as pd
 import csv
+import hashlib
+import json
+import os
+
+from src.anonymise import anonymisation_salt, anonymise_series
+from src.cohort import CohortIndex
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 RAW = DATA_DIR / "raw"
 PROCESSED = DATA_DIR / "processed"
 PROCESSED.mkdir(parents=True, exist_ok=True)
+COHORT_INDEX = PROCESSED / "cohort_index.npz"
+
+VALIDATION_REPORT = PROCESSED / "validation_report.json"
+
+# Student identifiers: hashed (never one-hot encoded) when present in the raw file
+ID_COLUMNS = ("student_id", "name", "email")
+
+# ---- Declared schema of the Student Performance file: column -> (kind, min, max).
+# "numeric" columns are coerced and range-checked (out of range -> missing),
+# "categorical" ones are one-hot encoded, "id" ones anonymised and kept as-is.
+# Undeclared columns fall back to their dtype: text -> categorical, else kept.
+_CATEGORICAL = ("school", "sex", "address", "famsize", "Pstatus", "Mjob", "Fjob", "reason",
+                "guardian", "schoolsup", "famsup", "paid", "activities", "nursery", "higher",
+                "internet", "romantic")
+SCHEMA = {
+    **{c: ("categorical", None, None) for c in _CATEGORICAL},
+    **{c: ("id", None, None) for c in ID_COLUMNS},
+    "age": ("numeric", 15, 22),
+    "Medu": ("numeric", 0, 4), "Fedu": ("numeric", 0, 4),
+    "traveltime": ("numeric", 1, 4), "studytime": ("numeric", 1, 4), "failures": ("numeric", 0, 4),
+    **{c: ("numeric", 1, 5) for c in ("famrel", "freetime", "goout", "Dalc", "Walc", "health")},
+    "absences": ("numeric", 0, None),
+    **{c: ("numeric", 0, 20) for c in ("G1", "G2", "G3")},
+}
 
 def _read_smart(path: Path) -> pd.DataFrame:
     # If extension is Excel or file header is PK.. (xlsx/zip), read as Excel
@@ -40,7 +72,48 @@ def _read_smart(path: Path) -> pd.DataFrame:
     # last resort
     return pd.read_csv(path, sep=";", encoding="latin-1", engine="python", on_bad_lines="skip")
 
-def build_dataset() -> pd.DataFrame:
+def coerce_and_validate(df_raw: pd.DataFrame, schema: dict = SCHEMA, anonymise: bool = True):
+    """One pass over the columns: coerce, range-check, hash ids, pick categoricals.
+
+    Returns (kept columns, dummy frames, report); nothing is assembled into a
+    frame here, so no intermediate full-frame copies are made.
+    """
+    kept, dummies, columns = {}, [], {}
+    hash_ids = anonymise and any(schema.get(c, ("",))[0] == "id" for c in df_raw.columns)
+    salt = anonymisation_salt() if hash_ids else None
+    for col in df_raw.columns:
+        s = df_raw[col]
+        kind, lo, hi = schema.get(col, (None, None, None))
+        if kind is None:
+            text = pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)
+            kind = "categorical" if text else "keep"
+        nulls = int(s.isna().sum())
+        entry = {"kind": kind, "nulls": nulls}
+        if kind == "numeric":
+            v = pd.to_numeric(s, errors="coerce")
+            entry["failed"] = int(v.isna().sum()) - nulls
+            bad = pd.Series(False, index=v.index)
+            if lo is not None:
+                bad |= v < lo
+            if hi is not None:
+                bad |= v > hi
+            entry["out_of_range"] = int(bad.sum())
+            kept[col] = v.mask(bad) if entry["out_of_range"] else v
+        elif kind == "categorical":
+            d = pd.get_dummies(s, prefix=col, drop_first=True, dtype=int)
+            entry["levels"] = int(s.nunique())
+            dummies.append(d)
+        elif kind == "id" and hash_ids:
+            kept[col] = anonymise_series(s, salt)
+        else:
+            kept[col] = s
+        columns[col] = entry
+    report = {"rows_in": len(df_raw), "columns": columns}
+    if hash_ids:
+        report["ids_salted"] = bool(salt)  # False: tokens are reversible (BI_ANON_SALT unset)
+    return kept, dummies, report
+
+def build_dataset(anonymise: bool = True) -> pd.DataFrame:
     # Prefer xlsx if present; else fall back to dataset.csv
     xlsx = RAW / "dataset.xlsx"
     csvp = RAW / "dataset.csv"
@@ -53,21 +126,58 @@ def build_dataset() -> pd.DataFrame:
     if "G3" not in df_raw.columns:
         raise ValueError(f"'G3' not in columns: {list(df_raw.columns)[:12]} ...")
 
-    # Coerce common numeric cols
-    for col in ["G1","G2","G3","age","studytime","failures","absences"]:
-        if col in df_raw.columns:
-            df_raw[col] = pd.to_numeric(df_raw[col], errors="coerce")
+    kept, dummies, report = coerce_and_validate(df_raw, anonymise=anonymise)
 
     # Binary label for classification
-    df_raw["Pass"] = (df_raw["G3"] >= 10).astype("Int64")
+    kept["Pass"] = (kept["G3"] >= 10).astype("Int64")
 
-    # One-hot encode categoricals
-    df_proc = pd.get_dummies(df_raw, columns=[c for c in df_raw.columns if df_raw[c].dtype == "object"],
-                             drop_first=True, dtype=int)
+    # Drop rows missing the target while assembling: one boolean take per column,
+    # then a single frame construction (same column order as before: kept, Pass, dummies)
+    keep = kept["G3"].notna().to_numpy()
+    rows = slice(None) if keep.all() else keep
+    cols = {c: v.array[rows] for c, v in kept.items()}
+    for d in dummies:
+        cols.update({c: d[c].to_numpy()[rows] for c in d.columns})
+    df_proc = pd.DataFrame(cols)
 
-    # Drop rows missing targets
-    df_proc = df_proc.dropna(subset=["G3","Pass"]).reset_index(drop=True)
+    report["rows_out"] = len(df_proc)
+    report["dropped_missing_target"] = report["rows_in"] - len(df_proc)
+    df_proc.attrs["validation"] = report
+    _write_atomic(VALIDATION_REPORT, lambda tmp: tmp.write_text(json.dumps(report, indent=1)))
 
+    # Write then rename: readers (SharedDataset, the pipeline) only ever see a
+    # complete file, the previous one or the new one
     out = PROCESSED / "dataset_clean.csv"
-    df_proc.to_csv(out, index=False)
+    _write_atomic(out, lambda tmp: df_proc.to_csv(tmp, index=False))
+
+    # Bitmap / sorted indexes for cohort filters, keyed to the file just written
+    CohortIndex.build(df_proc, file_fingerprint(out)).save(COHORT_INDEX)
     return df_proc
+
+def _write_atomic(path: Path, write) -> None:
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+# ---- Fingerprints used to key on-disk caches (importance, reports, pipeline)
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a frame: column names + row-wise hashed values."""
+    h = hashlib.sha1("|".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+def file_fingerprint(path: Path | BinaryIO) -> str:
+    """Content hash of a file on disk or an open binary file (read in 1 MiB blocks)."""
+    if hasattr(path, "read"):
+        return _hash_blocks(path)
+    with open(path, "rb") as f:
+        return _hash_blocks(f)
+
+def _hash_blocks(f: BinaryIO) -> str:
+    h = hashlib.sha1()
+    for block in iter(lambda: f.read(1 << 20), b""):
+        h.update(block)
+    return h.hexdigest()[:16]
@@ -0,0 +1,114 @@
+"""One shared, read-only, memory-mapped copy of the processed dataset.
+
+``st.cache_data`` pickles the frame and gives every rerun and every session its
+own deserialised copy. ``SharedDataset`` instead converts the processed CSV
+once per content fingerprint into one ``.npy`` file per column under
+``data/processed/.mmap/<fingerprint>/``, maps those read-only and hands every
+caller a shallow view of the same frame. The OS page cache keeps a single copy
+for all sessions. A session that writes into its view either hits the read-only
+mapping (error) or, under pandas copy-on-write, gets a private copy of that one
+column. Either way other sessions never see the write.
+
+Each ``get()`` stats the CSV (cheap). When it changes, a new snapshot is built
+and swapped in under a lock. ``build_dataset`` replaces the CSV atomically, so
+a snapshot is always taken from one complete version. Sessions still holding
+the old view keep using it until their next rerun.
+"""
+from __future__ import annotations
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion import PROCESSED, build_dataset, file_fingerprint
+
+STORE_DIR = PROCESSED / ".mmap"
+KEEP_SNAPSHOTS = 2
+
+class _Snapshot:
+    def __init__(self, signature: tuple, fingerprint: str, frame: pd.DataFrame):
+        self.signature = signature
+        self.fingerprint = fingerprint
+        self.frame = frame
+
+def _signature(st: os.stat_result) -> tuple:
+    return (st.st_mtime_ns, st.st_size)
+
+def _write_columns(csv_file, target: Path) -> None:
+    # Build in a temp dir and rename, so readers never see a half-written snapshot
+    tmp = target.with_name(target.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    df = pd.read_csv(csv_file)
+    meta = {"columns": [], "rows": len(df)}
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            # Text columns cannot be memory-mapped; keep them in a small pickle
+            df[[col]].to_pickle(tmp / f"{i}.pkl")
+            meta["columns"].append([col, "pkl"])
+        else:
+            np.save(tmp / f"{i}.npy", values, allow_pickle=False)
+            meta["columns"].append([col, "npy"])
+    (tmp / "meta.json").write_text(json.dumps(meta))
+    try:
+        tmp.rename(target)
+    except OSError:  # another process/thread finished the same snapshot first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _open_columns(target: Path) -> pd.DataFrame:
+    meta = json.loads((target / "meta.json").read_text())
+    cols = {}
+    for i, (col, kind) in enumerate(meta["columns"]):
+        if kind == "npy":
+            cols[col] = np.load(target / f"{i}.npy", mmap_mode="r")
+        else:
+            cols[col] = pd.read_pickle(target / f"{i}.pkl")[col].to_numpy()
+    # copy=False keeps one block per memory-mapped column instead of consolidating
+    return pd.DataFrame(cols, copy=False)
+
+class SharedDataset:
+    def __init__(self, path: Path = PROCESSED / "dataset_clean.csv", store_dir: Path = STORE_DIR):
+        self.path = Path(path)
+        self.store_dir = Path(store_dir)
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+
+    def get(self) -> tuple[str, pd.DataFrame]:
+        """(fingerprint, read-only view) of the current processed dataset."""
+        if not self.path.exists():
+            with self._lock:
+                if not self.path.exists():
+                    build_dataset()
+        snap = self._snapshot
+        if snap is None or snap.signature != _signature(self.path.stat()):
+            with self._lock:
+                snap = self._snapshot
+                if snap is None or snap.signature != _signature(self.path.stat()):
+                    snap = self._load()
+                    self._snapshot = snap  # atomic swap: readers see old or new, never partial
+        return snap.fingerprint, snap.frame.copy(deep=False)
+
+    def _load(self) -> _Snapshot:
+        # build_dataset replaces the CSV atomically; stat, hash and parse one open
+        # handle so a replace during the load cannot mix two versions
+        with open(self.path, "rb") as f:
+            signature = _signature(os.fstat(f.fileno()))
+            fingerprint = file_fingerprint(f)
+            target = self.store_dir / fingerprint
+            if not (target / "meta.json").exists():
+                f.seek(0)
+                _write_columns(f, target)
+        self._prune(keep=fingerprint)
+        return _Snapshot(signature, fingerprint, _open_columns(target))
+
+    def _prune(self, keep: str) -> None:
+        # Drop all but the newest snapshots; open maps of removed files stay valid on POSIX
+        snaps = sorted((p for p in self.store_dir.iterdir() if p.is_dir() and ".tmp" not in p.name),
+                       key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in [p for p in snaps if p.name != keep][KEEP_SNAPSHOTS - 1:]:
+            shutil.rmtree(old, ignore_errors=True)
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+
+# matplotlib is imported inside the plotting functions so that describe()
+# and the data preview do not pay for it on cold start.
 
 def describe(df: pd.DataFrame) -> pd.DataFrame:
     return df.describe(include="all").T
@@ -31,6 +33,8 @@ def corr_heatmap(df: pd.DataFrame, top_n: int = 15):
         view = num[var]
     corr = view.corr(numeric_only=True)
 
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(6, 5))
     im = ax.imshow(corr.values, aspect="auto")
     ax.set_xticks(range(len(corr.columns)))
@@ -43,6 +47,7 @@ def corr_heatmap(df: pd.DataFrame, top_n: int = 15):
 
 # ---- New: bar chart of mean G3 by a discrete column
 def bar_mean_g3_by(df: pd.DataFrame, by_col: str = "studytime"):
+    import matplotlib.pyplot as plt
     if "G3" not in df.columns or by_col not in df.columns:
         fig, ax = plt.subplots()
         ax.text(0.5, 0.5, "G3 or selected column not found", ha="center")
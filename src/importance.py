@@ -0,0 +1,74 @@
+from __future__ import annotations
+import hashlib
+import json
+import pandas as pd
+
+from src.data_ingestion import dataset_fingerprint, file_fingerprint
+from src.models import MODELS_DIR, Progress, _stage
+
+CACHE_DIR = MODELS_DIR / "importance"
+
+# Scoring per saved artifact; KMeans has no target so it is not supported here
+ARTIFACT_SCORING = {
+    "classifier.joblib": "accuracy",
+    "regressor.joblib": "r2",
+}
+
+def model_features(model) -> list[str]:
+    # Pipelines fitted on DataFrames remember their input columns
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        raise ValueError("Model was not fitted on a DataFrame; feature names are unknown")
+    return list(names)
+
+def feature_importance(df: pd.DataFrame, target: str, artifact: str = "classifier.joblib",
+                       n_repeats: int = 5, sample_size: int | None = 2000,
+                       n_jobs: int = -1, random_state: int = 42,
+                       use_cache: bool = True, progress: Progress = None) -> pd.DataFrame:
+    """Permutation importance of a saved model, parallel across features.
+
+    Scores on at most `sample_size` rows (None = all). Results are cached per
+    (artifact contents, dataset fingerprint, parameters) under models/importance/.
+    """
+    import joblib
+    from sklearn.inspection import permutation_importance
+
+    path = MODELS_DIR / artifact
+    if not path.exists():
+        raise FileNotFoundError(f"Train the model first: {path} not found")
+    scoring = ARTIFACT_SCORING.get(artifact)
+    if scoring is None:
+        raise ValueError(f"No scoring defined for {artifact}; choose from {list(ARTIFACT_SCORING)}")
+
+    _stage(progress, "load")
+    model = joblib.load(path)
+    features = model_features(model)
+    data = df.dropna(subset=features + [target])
+    if sample_size is not None and len(data) > sample_size:
+        data = data.sample(n=sample_size, random_state=random_state)
+
+    params = {"target": target, "n_repeats": n_repeats, "sample_size": sample_size,
+              "random_state": random_state}
+    key = "_".join([
+        path.stem,
+        file_fingerprint(path),
+        dataset_fingerprint(data[features + [target]]),
+        hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:8],
+    ])
+    cached = CACHE_DIR / f"{key}.csv"
+    if use_cache and cached.exists():
+        return pd.read_csv(cached, index_col="feature")
+
+    _stage(progress, "permute")
+    result = permutation_importance(
+        model, data[features], data[target], scoring=scoring,
+        n_repeats=n_repeats, n_jobs=n_jobs, random_state=random_state,
+    )
+    out = pd.DataFrame(
+        {"importance_mean": result.importances_mean, "importance_std": result.importances_std},
+        index=pd.Index(features, name="feature"),
+    ).sort_values("importance_mean", ascending=False)
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    out.to_csv(cached)
+    return out
@@ -0,0 +1,271 @@
+"""Background training jobs.
+
+Training runs in separate worker processes so a Streamlit session never blocks
+on a fit. One JobManager is shared by every session (the app keeps it in
+``st.cache_resource``):
+
+- at most ``max_workers`` fits run at once across all sessions; the rest wait
+  in a local FIFO queue. Each fit gets ``cpu_count // max_workers`` cores for
+  its own threads and processes
+- submitting a job identical to one still queued/running returns the existing
+  job id instead of training twice
+- each worker streams its stages back over its own pipe, so the UI can show the
+  current stage and per-stage timings
+- queued jobs are dropped on cancel, running ones have their process terminated
+- a job whose worker cannot start (unpicklable arguments, no memory, ...) fails
+  on its own; the pump thread shared by all sessions keeps running
+"""
+from __future__ import annotations
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+from src.data_ingestion import dataset_fingerprint
+
+# Job kind -> (module, function); each is called as fn(df, *args, progress=..., **kwargs)
+TRAINERS = {
+    "classifier": ("src.models", "train_classifier"),
+    "regressor": ("src.models", "train_regressor"),
+    "cluster": ("src.models", "train_cluster"),
+    "compare_regressors": ("src.models", "compare_regressors"),
+    "importance": ("src.importance", "feature_importance"),
+}
+
+# Kinds whose function takes n_jobs (processes/threads it may start itself)
+N_JOBS_KINDS = ("regressor", "compare_regressors", "importance")
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+IN_FLIGHT = (QUEUED, RUNNING)
+
+def _default_workers() -> int:
+    env = os.environ.get("BI_MAX_TRAIN_JOBS")
+    if env:
+        return max(1, int(env))
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def _worker(conn, kind: str, df: pd.DataFrame, args: tuple, kwargs: dict, cpus: int) -> None:
+    # Runs in the child process; every message is (event, payload, wall-clock time)
+    import importlib
+    from threadpoolctl import threadpool_limits
+
+    def progress(stage: str) -> None:
+        conn.send(("stage", stage, time.time()))
+
+    if kind in N_JOBS_KINDS:
+        kwargs = {"n_jobs": cpus, **kwargs}
+    try:
+        # Stay inside this job's share of the cores: OpenMP (hist_gb, KMeans) and BLAS
+        # threads are capped here, joblib workers via n_jobs above
+        with threadpool_limits(limits=cpus):
+            module, name = TRAINERS[kind]
+            result = getattr(importlib.import_module(module), name)(df, *args, progress=progress, **kwargs)
+        conn.send(("done", result, time.time()))
+    except Exception as e:  # reported to the UI, not raised in the server
+        conn.send(("failed", f"{type(e).__name__}: {e}", time.time()))
+    finally:
+        conn.close()
+
+class Job:
+    def __init__(self, job_id: str, kind: str, key: str, payload: tuple):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.state = QUEUED
+        self.stages: list[tuple[str, float]] = []  # (stage, start time)
+        self.result = None
+        self.error: str | None = None
+        self.submitted = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self._payload = payload  # (df, args, kwargs); released once the worker starts
+        self._process = None
+        self._conn = None
+
+    @property
+    def stage(self) -> str | None:
+        return self.stages[-1][0] if self.stages else None
+
+    def stage_timings(self) -> dict[str, float]:
+        """Seconds spent per stage (the current stage is timed up to now)."""
+        ends = [t for _, t in self.stages[1:]] + [self.finished or time.time()]
+        return {name: round(end - start, 3) for (name, start), end in zip(self.stages, ends)}
+
+    def to_dict(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "id": self.id, "kind": self.kind, "state": self.state, "stage": self.stage,
+            "stage_seconds": self.stage_timings(),
+            "elapsed": round(end - (self.started or end), 3),
+            "result": self.result, "error": self.error,
+        }
+
+class JobManager:
+    def __init__(self, max_workers: int | None = None, poll_interval: float = 0.2,
+                 keep_seconds: float = 3600):
+        self.max_workers = max_workers or _default_workers()
+        # Cores per job, so max_workers concurrent fits never ask for more than the machine has
+        self.cpus_per_job = max(1, (os.cpu_count() or 1) // self.max_workers)
+        self.poll_interval = poll_interval
+        self.keep_seconds = keep_seconds
+        # spawn: forking a multi-threaded server (Streamlit) is unsafe
+        self._ctx = mp.get_context("spawn")
+        self._jobs: dict[str, Job] = {}
+        self._pending: deque[str] = deque()
+        self._running: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._pump = threading.Thread(target=self._loop, name="job-pump", daemon=True)
+        self._pump.start()
+
+    # ---- public API
+    def submit(self, kind: str, df: pd.DataFrame, *args, **kwargs) -> str:
+        """Queue a training job and return its id (or the id of an identical in-flight job)."""
+        if kind not in TRAINERS:
+            raise ValueError(f"Unknown job kind {kind!r}; choose from {list(TRAINERS)}")
+        key = self._job_key(kind, df, args, kwargs)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.state in IN_FLIGHT:
+                    return job.id
+            job = Job(uuid.uuid4().hex[:12], kind, key, (df, args, kwargs))
+            self._jobs[job.id] = job
+            self._pending.append(job.id)
+        return job.id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state not in IN_FLIGHT:
+                return False
+            if job.state == QUEUED:
+                self._pending.remove(job_id)
+            elif job._process is not None:
+                # The pump thread reaps the process and closes its pipe
+                job._process.terminate()
+            # else: still starting; the pump terminates it as soon as it is up
+            job.state = CANCELLED
+            job.finished = time.time()
+            job._payload = None
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"running": len(self._running), "queued": len(self._pending),
+                    "max_workers": self.max_workers, "cpus_per_job": self.cpus_per_job}
+
+    # ---- internals
+    @staticmethod
+    def _job_key(kind: str, df: pd.DataFrame, args: tuple, kwargs: dict) -> str:
+        params = json.dumps([kind, list(args), kwargs], sort_keys=True, default=str)
+        return hashlib.sha1(f"{params}|{dataset_fingerprint(df)}".encode("utf-8")).hexdigest()
+
+    def _start(self, job: Job, payload: tuple) -> None:
+        # Called without the lock: pickling the frame and spawning an interpreter is
+        # slow, and get()/submit() from every session must not wait on it
+        df, args, kwargs = payload
+        recv = send = None
+        try:
+            recv, send = self._ctx.Pipe(duplex=False)
+            # Not daemonic: sklearn/joblib need to start their own workers inside the job
+            proc = self._ctx.Process(target=_worker, args=(send, job.kind, df, args, kwargs, self.cpus_per_job),
+                                     daemon=False)
+            proc.start()
+        except Exception as e:  # unpicklable arguments, EAGAIN, out of memory, ...
+            for conn in (recv, send):
+                if conn is not None:
+                    conn.close()
+            with self._lock:
+                self._fail(job, f"could not start worker: {type(e).__name__}: {e}")
+            return
+        send.close()  # the child owns the sending end now
+        with self._lock:
+            job._process, job._conn = proc, recv
+            if job.state == CANCELLED:  # cancelled while it was starting
+                proc.terminate()
+                self._release(job)
+
+    def _fail(self, job: Job, error: str) -> None:
+        if job.state in IN_FLIGHT:
+            job.state, job.error, job.finished = FAILED, error, time.time()
+        if job._process is not None and job._process.is_alive():
+            job._process.terminate()
+        self._release(job)
+
+    def _release(self, job: Job) -> None:
+        self._running.pop(job.id, None)
+        if job._conn is not None:
+            job._conn.close()
+        if job._process is not None:
+            job._process.join(timeout=1)
+        job._process = job._conn = None
+
+    def _handle(self, job: Job) -> None:
+        try:
+            event, payload, at = job._conn.recv()
+        except EOFError:
+            # Worker exited without reporting (crash, OOM kill)
+            job._process.join(timeout=1)
+            job.state = FAILED
+            job.error = f"worker exited with code {job._process.exitcode}"
+            job.finished = time.time()
+            self._release(job)
+            return
+        if event == "stage":
+            job.stages.append((payload, at))
+        elif event == "done":
+            job.state, job.result, job.finished = DONE, payload, at
+            self._release(job)
+        elif event == "failed":
+            job.state, job.error, job.finished = FAILED, payload, at
+            self._release(job)
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                # Reserve the slots now; the processes are started below, outside the lock
+                starting = []
+                while self._pending and len(self._running) < self.max_workers:
+                    job = self._jobs[self._pending.popleft()]
+                    job.state, job.started = RUNNING, time.time()
+                    self._running[job.id] = job
+                    starting.append((job, job._payload))
+                    job._payload = None
+            for job, payload in starting:
+                self._start(job, payload)
+            with self._lock:
+                conns = {job._conn: job for job in self._running.values() if job._conn is not None}
+            if not conns:
+                time.sleep(self.poll_interval)
+                continue
+            ready = wait(list(conns), timeout=self.poll_interval)
+            with self._lock:
+                for conn in ready:
+                    job = conns[conn]
+                    # One bad job (e.g. an unpicklable result) must not stop the pump,
+                    # which every session shares
+                    try:
+                        if job.state == RUNNING:
+                            self._handle(job)
+                        else:  # cancelled while we were waiting
+                            self._release(job)
+                    except Exception as e:
+                        self._fail(job, f"{type(e).__name__}: {e}")
+                self._prune()
+
+    def _prune(self) -> None:
+        # Forget finished jobs after keep_seconds so the registry does not grow forever
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
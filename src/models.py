@@ -1,49 +1,182 @@
 from __future__ import annotations
+import json
+import os
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.cluster import KMeans
-from sklearn.metrics import accuracy_score, r2_score, silhouette_score
-import joblib
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Optional
+
+# sklearn and joblib are imported inside the functions that need them, so
+# importing this module (e.g. for MODELS_DIR or the engine names) stays cheap.
 
 MODELS_DIR = Path(__file__).resolve().parents[1] / "models"
 MODELS_DIR.mkdir(exist_ok=True)
 
-def train_classifier(df: pd.DataFrame, features: list[str], target: str):
+# Optional stage callback: trainers call progress("split"), progress("fit"), ...
+# so background jobs (src.jobs) can report what is running and how long it took.
+Progress = Optional[Callable[[str], None]]
+
+def _stage(progress: Progress, name: str) -> None:
+    if progress is not None:
+        progress(name)
+
+def _features_path(path: Path) -> Path:
+    return path.with_suffix(".features.json")
+
+@lru_cache(maxsize=32)
+def _artifact_fingerprint(path: str, mtime_ns: int, size: int) -> str:
+    from src.data_ingestion import file_fingerprint
+    return file_fingerprint(Path(path))
+
+def _dump(obj, path: Path, features: list[str] | None = None) -> None:
+    # Write then rename, so a cancelled job never leaves a half-written model behind.
+    # Temp names are per process: app jobs and pipeline trainers may save the same model
+    import joblib
+    from src.data_ingestion import file_fingerprint
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    side = _features_path(path)
+    side_tmp = side.with_name(f"{side.name}.tmp{os.getpid()}")
+    try:
+        joblib.dump(obj, tmp)
+        if features is not None:
+            # Feature names next to the artifact, so the app can list them without
+            # unpickling; tied to the model's contents in case another job replaces
+            # the model between the two renames
+            side_tmp.write_text(json.dumps({"model": file_fingerprint(tmp), "features": list(features)}))
+        os.replace(tmp, path)
+        if features is not None:
+            os.replace(side_tmp, side)
+    finally:
+        tmp.unlink(missing_ok=True)
+        side_tmp.unlink(missing_ok=True)
+
+def saved_features(name: str) -> list[str] | None:
+    """Input features of a saved model (from its sidecar), or None if unknown."""
+    path, side = MODELS_DIR / name, _features_path(MODELS_DIR / name)
+    if not path.exists() or not side.exists():
+        return None
+    meta = json.loads(side.read_text())
+    st = path.stat()
+    if meta.get("model") != _artifact_fingerprint(str(path), st.st_mtime_ns, st.st_size):
+        return None  # sidecar belongs to a different save of this model
+    return meta["features"]
+
+def default_features(df: pd.DataFrame) -> list[str]:
+    # Try a small sensible numeric feature set commonly present in student datasets
+    features = [c for c in ["age", "studytime", "failures", "absences", "Medu", "Fedu"] if c in df.columns]
+    # Add one-hot columns that are likely present
+    features += [c for c in df.columns if c.startswith("sex_") or c.startswith("address_") or c.startswith("famsize_")]
+
+    # Fallback to any numeric columns if the above are missing
+    if len(features) < 4:
+        features = df.select_dtypes(include=["number", "bool", "int", "float"]).columns.tolist()
+        # Don't include targets as features
+        features = [c for c in features if c not in {"Pass", "G3"}]
+    return features
+
+def train_classifier(df: pd.DataFrame, features: list[str], target: str, progress: Progress = None):
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.pipeline import Pipeline
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score
+
     X = df[features]
     y = df[target]
     stratify = y if y.nunique() <= 10 else None
+    _stage(progress, "split")
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=stratify)
     pipe = Pipeline([
         ("scale", StandardScaler(with_mean=False)),
         ("clf", LogisticRegression(max_iter=1000))
     ])
+    _stage(progress, "fit")
     pipe.fit(X_train, y_train)
+    _stage(progress, "score")
     acc = accuracy_score(y_test, pipe.predict(X_test))
-    joblib.dump(pipe, MODELS_DIR / "classifier.joblib")
+    _stage(progress, "save")
+    _dump(pipe, MODELS_DIR / "classifier.joblib", features)
     return {"accuracy": acc}
 
-def train_regressor(df: pd.DataFrame, features: list[str], target: str):
+# ---- Regressor engines: name -> (needs scaling, estimator factory)
+# "tree" is the original single decision tree; "hist_gb" bins features into
+# at most 255 buckets, fits multi-threaded and stops early on a validation split,
+# which keeps fit time flat-ish on millions of rows and curbs the tree's overfitting.
+# Factories take the job's process budget; hist_gb's OpenMP threads are capped by
+# the caller (src.jobs wraps each job in threadpool_limits).
+def _tree(n_jobs: int = -1):
+    from sklearn.tree import DecisionTreeRegressor
+    return DecisionTreeRegressor(random_state=42)
+
+def _hist_gb(n_jobs: int = -1):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    return HistGradientBoostingRegressor(max_bins=255, early_stopping=True, validation_fraction=0.1,
+                                         n_iter_no_change=10, random_state=42)
+
+def _random_forest(n_jobs: int = -1):
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=200, min_samples_leaf=5, n_jobs=n_jobs, random_state=42)
+
+REGRESSOR_ENGINES = {
+    "tree": (True, _tree),
+    "hist_gb": (False, _hist_gb),
+    "random_forest": (False, _random_forest),
+}
+
+def _regressor_pipeline(engine: str, n_jobs: int = -1):
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.pipeline import Pipeline
+
+    if engine not in REGRESSOR_ENGINES:
+        raise ValueError(f"Unknown regressor engine {engine!r}; choose from {list(REGRESSOR_ENGINES)}")
+    scale, make = REGRESSOR_ENGINES[engine]
+    steps = [("scale", StandardScaler(with_mean=False))] if scale else []
+    return Pipeline(steps + [("reg", make(n_jobs))])
+
+def train_regressor(df: pd.DataFrame, features: list[str], target: str,
+                    engine: str = "tree", save: bool = True, n_jobs: int = -1,
+                    progress: Progress = None):
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import r2_score
+
     X = df[features]
     y = df[target]
+    _stage(progress, "split")
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    pipe = Pipeline([
-        ("scale", StandardScaler(with_mean=False)),
-        ("reg", DecisionTreeRegressor(random_state=42))
-    ])
+    pipe = _regressor_pipeline(engine, n_jobs)
+    _stage(progress, "fit")
+    t0 = time.perf_counter()
     pipe.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - t0
+    _stage(progress, "score")
     r2 = r2_score(y_test, pipe.predict(X_test))
-    joblib.dump(pipe, MODELS_DIR / "regressor.joblib")
-    return {"r2": r2}
+    if save:
+        _stage(progress, "save")
+        _dump(pipe, MODELS_DIR / "regressor.joblib", features)
+    return {"engine": engine, "r2": r2, "fit_seconds": round(fit_seconds, 3)}
+
+def compare_regressors(df: pd.DataFrame, features: list[str], target: str,
+                       engines: list[str] | None = None, n_jobs: int = -1,
+                       progress: Progress = None) -> pd.DataFrame:
+    # Fit every engine on the same split without overwriting the saved model
+    rows = []
+    for e in engines or list(REGRESSOR_ENGINES):
+        prefixed = None if progress is None else (lambda stage, e=e: progress(f"{e}:{stage}"))
+        rows.append(train_regressor(df, features, target, engine=e, save=False, n_jobs=n_jobs,
+                                    progress=prefixed))
+    return pd.DataFrame(rows).set_index("engine")
+
+def train_cluster(df: pd.DataFrame, features: list[str], k: int = 3, progress: Progress = None):
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
 
-def train_cluster(df: pd.DataFrame, features: list[str], k: int = 3):
     X = df[features]
     km = KMeans(n_clusters=k, n_init=10, random_state=42)
+    _stage(progress, "fit")
     labels = km.fit_predict(X)
+    _stage(progress, "score")
     score = silhouette_score(X, labels)
-    joblib.dump(km, MODELS_DIR / f"kmeans_k{k}.joblib")
+    _stage(progress, "save")
+    _dump(km, MODELS_DIR / f"kmeans_k{k}.joblib")
     return {"silhouette": score}
@@ -0,0 +1,208 @@
+"""Batch pipeline: ingest -> features -> models -> reports, as a cached DAG.
+
+    python -m src.pipeline              # run whatever is stale
+    python -m src.pipeline --dry-run    # only show what would rerun, and why
+    python -m src.pipeline --force ingest
+
+Every stage declares its upstream stages, its own code files, any external
+input files and the files it writes. Its input fingerprint combines the code,
+the external inputs, its parameters and the output fingerprints of its
+upstream stages. A stage reruns only if that fingerprint changed, its outputs
+are missing or were modified since it ran, or it was forced. If an upstream
+stage reruns but writes byte-identical files, downstream stages stay cached.
+Stages whose dependencies are done run concurrently in a process pool (e.g. the
+three trainers after ``features``). Stamps live in ``.pipeline/``.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+from src.data_ingestion import PROCESSED, RAW, build_dataset, file_fingerprint
+from src.models import MODELS_DIR
+from src.report import REPORTS_DIR
+
+ROOT = Path(__file__).resolve().parents[1]
+STAMPS_DIR = ROOT / ".pipeline"
+SRC = ROOT / "src"
+DATASET = PROCESSED / "dataset_clean.csv"
+FEATURES = PROCESSED / "features.json"
+
+# ---- Stage bodies (module level so worker processes can run them)
+def _ingest() -> dict:
+    df = build_dataset()
+    return {"rows": len(df), "columns": df.shape[1]}
+
+def _features() -> dict:
+    from src.models import default_features
+    df = pd.read_csv(DATASET)
+    spec = {"features": default_features(df), "class_target": "Pass", "reg_target": "G3"}
+    FEATURES.write_text(json.dumps(spec, indent=1))
+    return {"n_features": len(spec["features"])}
+
+def _train(kind: str, **params) -> dict:
+    from src import models
+    df = pd.read_csv(DATASET)
+    spec = json.loads(FEATURES.read_text())
+    feats = spec["features"]
+    if kind == "classifier":
+        use = df.dropna(subset=feats + [spec["class_target"]])
+        return models.train_classifier(use, feats, spec["class_target"])
+    if kind == "regressor":
+        use = df.dropna(subset=feats + [spec["reg_target"]])
+        return models.train_regressor(use, feats, spec["reg_target"], **params)
+    return models.train_cluster(df.dropna(subset=feats), feats, **params)
+
+def _report() -> dict:
+    # Figure fingerprints cover the drawing code, so only affected figures re-render
+    from src.report import build_report
+    return build_report()
+
+def _raw_dataset() -> list[Path]:
+    xlsx = RAW / "dataset.xlsx"
+    return [xlsx if xlsx.exists() else RAW / "dataset.csv"]
+
+class Stage:
+    def __init__(self, name: str, fn, deps=(), outputs=(), code=(), inputs=None, params=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.outputs = [Path(p) for p in outputs]
+        self.code = [SRC / c for c in code]
+        self.inputs = inputs or (lambda: [])  # external files, resolved at run time
+        self.params = params or {}
+
+STAGES = [
+    # The cohort index is rebuilt on demand from DATASET, so only the CSV is tracked
+    Stage("ingest", _ingest, outputs=[DATASET], inputs=_raw_dataset,
+          code=["data_ingestion.py", "anonymise.py", "cohort.py"]),
+    Stage("features", _features, deps=["ingest"], outputs=[FEATURES], code=["pipeline.py", "models.py"]),
+    Stage("classifier", _train, deps=["ingest", "features"], outputs=[MODELS_DIR / "classifier.joblib"],
+          code=["models.py"], params={"kind": "classifier"}),
+    Stage("regressor", _train, deps=["ingest", "features"], outputs=[MODELS_DIR / "regressor.joblib"],
+          code=["models.py"], params={"kind": "regressor", "engine": "hist_gb"}),
+    Stage("cluster", _train, deps=["ingest", "features"], outputs=[MODELS_DIR / "kmeans_k3.joblib"],
+          code=["models.py"], params={"kind": "cluster", "k": 3}),
+    Stage("report", _report, deps=["ingest"], outputs=[REPORTS_DIR / "index.html"],
+          code=["report.py", "eda.py"]),
+]
+
+# ---- Fingerprints and stamps
+def _files_fingerprint(paths) -> str:
+    h = hashlib.sha1()
+    for p in paths:
+        h.update(f"{p.name}:{file_fingerprint(p) if p.exists() else 'missing'}|".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def _stamp_path(name: str) -> Path:
+    return STAMPS_DIR / f"{name}.json"
+
+def _read_stamp(name: str) -> dict | None:
+    p = _stamp_path(name)
+    return json.loads(p.read_text()) if p.exists() else None
+
+def input_fingerprint(stage: Stage, stamps: dict[str, dict]) -> str:
+    upstream = {d: stamps[d]["outputs"] for d in stage.deps}
+    payload = json.dumps({"code": _files_fingerprint(stage.code),
+                          "inputs": _files_fingerprint(stage.inputs()),
+                          "params": stage.params, "upstream": upstream}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+def staleness(stage: Stage, stamps: dict[str, dict], rerun: set[str], force: set[str]) -> str | None:
+    """Why `stage` must run (None if its cached outputs are current)."""
+    if stage.name in force:
+        return "forced"
+    upstream = [d for d in stage.deps if d in rerun]
+    if upstream:
+        return f"upstream {', '.join(upstream)} will rerun"
+    stamp = _read_stamp(stage.name)
+    if stamp is None:
+        return "never ran"
+    if stamp["input"] != input_fingerprint(stage, stamps):
+        return "inputs changed"
+    for p in stage.outputs:
+        if not p.exists():
+            return f"{p.name} missing"
+    if stamp["outputs"] != _files_fingerprint(stage.outputs):
+        return "outputs modified"
+    return None
+
+def plan(stages=STAGES, force=()) -> list[tuple[str, str | None]]:
+    """(stage, reason) in dependency order; reason None = up to date."""
+    stamps = {}
+    rerun: set[str] = set()
+    out = []
+    for stage in stages:
+        reason = staleness(stage, stamps, rerun, set(force))
+        if reason:
+            rerun.add(stage.name)
+        else:
+            stamps[stage.name] = _read_stamp(stage.name)
+        out.append((stage.name, reason))
+    return out
+
+def run(stages=STAGES, force=(), workers: int | None = None) -> list[dict]:
+    """Execute stale stages, independent ones concurrently; returns one row per stage."""
+    STAMPS_DIR.mkdir(exist_ok=True)
+    by_name = {s.name: s for s in stages}
+    stamps: dict[str, dict] = {}
+    done: set[str] = set()
+    rows: dict[str, dict] = {}
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while len(done) < len(stages):
+            for stage in stages:
+                if stage.name in done or stage.name in running.values():
+                    continue
+                if not all(d in done for d in stage.deps):
+                    continue
+                # Upstream stages are finished here, so their fresh output fingerprints
+                # decide: an upstream rerun with identical outputs keeps this stage cached
+                reason = staleness(stage, stamps, set(), set(force))
+                if reason is None:
+                    stamps[stage.name] = _read_stamp(stage.name)
+                    rows[stage.name] = {"stage": stage.name, "status": "cached", "reason": "", "seconds": 0.0}
+                    done.add(stage.name)
+                    continue
+                fut = pool.submit(stage.fn, **stage.params)
+                running[fut] = stage.name
+                rows[stage.name] = {"stage": stage.name, "status": "running", "reason": reason,
+                                    "started": time.perf_counter()}
+            if not running:
+                continue  # newly cached stages may have unblocked others
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                stage, row = by_name[name], rows[name]
+                row["seconds"] = round(time.perf_counter() - row.pop("started"), 2)
+                result = fut.result()  # a failing stage stops the run
+                stamp = {"input": input_fingerprint(stage, stamps),
+                         "outputs": _files_fingerprint(stage.outputs),
+                         "result": result, "seconds": row["seconds"]}
+                _stamp_path(name).write_text(json.dumps(stamp, indent=1, default=str))
+                stamps[name] = stamp
+                row["status"] = "ran"
+                done.add(name)
+    return [rows[s.name] for s in stages]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run the ingest -> features -> models -> reports pipeline")
+    ap.add_argument("--dry-run", action="store_true", help="show what would rerun and why")
+    ap.add_argument("--force", nargs="*", default=[], help="stages to rerun regardless of cache")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    unknown = set(args.force) - {s.name for s in STAGES}
+    if unknown:
+        ap.error(f"unknown stage(s): {sorted(unknown)}")
+    if args.dry_run:
+        for name, reason in plan(force=args.force):
+            print(f"{name:<11} {'would rerun: ' + reason if reason else 'up to date'}")
+    else:
+        t0 = time.perf_counter()
+        print(pd.DataFrame(run(force=args.force, workers=args.workers)).to_string(index=False))
+        print(f"total {time.perf_counter() - t0:.2f} s")
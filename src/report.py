@@ -0,0 +1,160 @@
+"""Headless EDA report: every src.eda view as a static HTML + PNG bundle.
+
+    python -m src.report --out reports
+    python -m src.report --cohort "ms:school_MS=1" --cohort "at_risk:failures>0 | absences>=10"
+
+For each cohort (``all`` plus any ``NAME:FILTER`` given, see src.cohort) it
+writes describe(), the correlation heatmap, mean G3 by every factor and a
+histogram per numeric column. Figures render in worker processes on the Agg
+backend. Each figure's fingerprint covers only the columns it reads plus the
+drawing code (src/eda.py, ``_render``) and matplotlib version, and a figure
+whose fingerprint is unchanged since the last run is not redrawn.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import html
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion import PROCESSED, COHORT_INDEX, build_dataset, dataset_fingerprint, file_fingerprint
+from src.cohort import load_or_build
+
+REPORTS_DIR = Path(__file__).resolve().parents[1] / "reports"
+FACTORS = ("studytime", "failures", "absences", "Medu", "Fedu")
+
+# The plotting module; with _render's own source it is all the code that draws a
+# figure, so an edit to either re-renders every figure once (HTML tweaks do not)
+EDA_CODE = Path(__file__).resolve().parent / "eda.py"
+
+_FRAMES: dict[str, pd.DataFrame] = {}
+
+def _init_worker(frames: dict[str, pd.DataFrame]) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    _FRAMES.update(frames)
+
+def _render(cohort: str, kind: str, arg: str | None, path: str) -> str:
+    import matplotlib.pyplot as plt
+    from src.eda import corr_heatmap, bar_mean_g3_by, plot_hist
+
+    df = _FRAMES[cohort]
+    if kind == "heatmap":
+        fig = corr_heatmap(df)
+    elif kind == "bar":
+        fig = bar_mean_g3_by(df, by_col=arg)
+    else:
+        fig = plot_hist(df, arg).get_figure()
+    fig.savefig(path, dpi=100, bbox_inches="tight")
+    plt.close(fig)
+    return path
+
+def render_fingerprint() -> str:
+    """Hash of the drawing code and the matplotlib version (without importing it)."""
+    import inspect
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        mpl = version("matplotlib")
+    except PackageNotFoundError:
+        mpl = "missing"
+    parts = [f"eda:{file_fingerprint(EDA_CODE)}", inspect.getsource(_render), f"matplotlib:{mpl}"]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_") or "x"
+
+def figure_specs(df: pd.DataFrame) -> list[tuple[str, str | None, list[str]]]:
+    """(kind, argument, columns the figure reads) for every figure of one cohort."""
+    num = df.select_dtypes(include=[np.number, "bool"]).columns.tolist()
+    specs = [("heatmap", None, num)]
+    specs += [("bar", f, ["G3", f]) for f in FACTORS if f in df.columns and "G3" in df.columns]
+    specs += [("hist", c, [c]) for c in num]
+    return specs
+
+def load_frame() -> pd.DataFrame:
+    try:
+        return pd.read_csv(PROCESSED / "dataset_clean.csv")
+    except FileNotFoundError:
+        return build_dataset()
+
+def build_report(cohorts: dict[str, str] | None = None, out_dir: Path = REPORTS_DIR,
+                 workers: int | None = None, force: bool = False) -> dict:
+    """Render the bundle into `out_dir`; returns counts of rendered / skipped figures."""
+    t0 = time.perf_counter()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / "manifest.json"
+    manifest = {} if force or not manifest_path.exists() else json.loads(manifest_path.read_text())
+
+    df = load_frame()
+    index = load_or_build(df, COHORT_INDEX, file_fingerprint(PROCESSED / "dataset_clean.csv"))
+    exprs = {"all": ""}
+    exprs.update({_slug(name): expr for name, expr in (cohorts or {}).items()})
+    frames = {cohort: index.filter(df, expr) for cohort, expr in exprs.items()}
+
+    render = render_fingerprint()
+    todo, sections = [], []
+    for cohort, cdf in frames.items():
+        (out_dir / cohort).mkdir(exist_ok=True)
+        images = []
+        for kind, arg, cols in (figure_specs(cdf) if len(cdf) else []):
+            rel = f"{cohort}/{kind}" + (f"_{_slug(arg)}" if arg else "") + ".png"
+            fp = hashlib.sha1(f"{render}|{kind}|{arg}|{dataset_fingerprint(cdf[cols])}".encode()).hexdigest()
+            images.append(rel)
+            if manifest.get(rel) != fp or not (out_dir / rel).exists():
+                todo.append((cohort, kind, arg, str(out_dir / rel), rel, fp))
+        sections.append((cohort, exprs[cohort], len(cdf), cdf, images))
+
+    if todo:
+        needed = {t[0] for t in todo}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=({c: frames[c] for c in needed},)) as pool:
+            futures = [(pool.submit(_render, c, k, a, p), rel, fp) for c, k, a, p, rel, fp in todo]
+            for fut, rel, fp in futures:
+                fut.result()
+                manifest[rel] = fp
+        manifest_path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+
+    _write_html(out_dir / "index.html", sections)
+    n_figures = sum(len(s[4]) for s in sections)
+    return {"figures": n_figures, "rendered": len(todo), "skipped": n_figures - len(todo),
+            "seconds": round(time.perf_counter() - t0, 2), "out": str(out_dir / "index.html")}
+
+def _write_html(path: Path, sections) -> None:
+    from src.eda import describe
+
+    parts = ["<!doctype html><html><head><meta charset='utf-8'><title>EDA report</title>",
+             "<style>body{font-family:sans-serif;margin:2em}img{max-width:32%;margin:.3em}"
+             "table{font-size:.8em;border-collapse:collapse}td,th{padding:2px 6px}</style></head><body>",
+             "<h1>Student Performance – EDA report</h1>"]
+    for cohort, expr, n, cdf, images in sections:
+        parts.append(f"<h2>Cohort: {html.escape(cohort)}</h2>")
+        parts.append(f"<p>{n} students" + (f" · <code>{html.escape(expr)}</code>" if expr else "") + "</p>")
+        parts.append("<details><summary>Descriptive statistics</summary>")
+        parts.append(describe(cdf).to_html(float_format=lambda v: f"{v:.3g}", na_rep=""))
+        parts.append("</details>")
+        parts.extend(f"<img src='{html.escape(rel)}' alt='{html.escape(rel)}'>" for rel in images)
+    parts.append("</body></html>")
+    path.write_text("\n".join(parts), encoding="utf-8")
+
+def _parse_cohort(text: str) -> tuple[str, str]:
+    name, sep, expr = text.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Cohort must be NAME:FILTER, got {text!r}")
+    return name.strip(), expr.strip()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Render the EDA report as static HTML + PNGs")
+    ap.add_argument("--out", type=Path, default=REPORTS_DIR)
+    ap.add_argument("--cohort", type=_parse_cohort, action="append", default=[],
+                    help='NAME:FILTER, e.g. "ms:school_MS=1" (repeatable)')
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true", help="re-render every figure")
+    args = ap.parse_args()
+    print(build_report(dict(args.cohort), args.out, args.workers, args.force))
@@ -0,0 +1,45 @@
+"""Cold-start import-time report.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``,
+so the numbers reflect a cold start rather than whatever this process has
+already loaded.  Run ``python -m src.startup`` for a table.
+"""
+from __future__ import annotations
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_MODULES = ("pandas", "matplotlib.pyplot", "sklearn", "joblib", "streamlit",
+                   "src.data_ingestion", "src.eda", "src.models", "src.importance")
+
+# Heavy third-party packages whose presence in sys.modules is worth reporting
+HEAVY_MODULES = ("matplotlib", "sklearn", "scipy", "joblib")
+
+def import_time(module: str) -> dict:
+    """Cumulative cold import time (ms) of `module` and how many modules it pulls in."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    total_us, count = 0, 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        count += 1
+        if name.strip() == module:
+            total_us = int(cumulative)
+    return {"module": module, "ms": round(total_us / 1000, 1), "modules_loaded": count,
+            "ok": proc.returncode == 0}
+
+def import_report(modules=DEFAULT_MODULES):
+    import pandas as pd
+    return pd.DataFrame([import_time(m) for m in modules]).set_index("module")
+
+def loaded_heavy_modules() -> list[str]:
+    """Which heavy packages the current process has imported so far."""
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+if __name__ == "__main__":
+    print(import_report().to_string())
@@ -0,0 +1,153 @@
+"""What-if scenario scoring against the saved models.
+
+A scenario is a set of feature changes, each ``(op, value)`` with op one of
+``add`` (studytime +1), ``mul`` (absences x0.5) or ``set`` (failures = 0).
+``scenario_grid`` expands per-feature options into their cartesian product.
+``score_scenarios`` builds the whole (scenario x student x feature) block with
+numpy broadcasting and scores it with one predict_proba / predict call per
+model, so there is no Python loop over students.
+"""
+from __future__ import annotations
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion import SCHEMA
+from src.models import MODELS_DIR
+
+OPS = ("add", "mul", "set")
+
+# Above this many matrix cells the block is scored in scenario chunks (~40 MB of float64
+# per chunk; the chunk is built in place, plus one column-subset copy per model)
+MAX_CELLS = 5_000_000
+
+def load_models(classifier: str = "classifier.joblib", regressor: str = "regressor.joblib"):
+    """Saved (classifier, regressor); either is None if it has not been trained yet."""
+    import joblib
+    paths = (MODELS_DIR / classifier, MODELS_DIR / regressor)
+    return tuple(joblib.load(p) if p.exists() else None for p in paths)
+
+def describe_change(col: str, op: str, value: float) -> str:
+    if op == "add":
+        return f"{col} {value:+g}"
+    if op == "mul":
+        return f"{col} ×{value:g}"
+    return f"{col} = {value:g}"
+
+def scenario_grid(options: dict[str, list[tuple[str, float]]]) -> list[dict[str, tuple[str, float]]]:
+    """Cartesian product of per-feature changes, e.g.
+    {"studytime": [("add", 0), ("add", 1)], "failures": [("set", 0)]}."""
+    for col, changes in options.items():
+        for op, _ in changes:
+            if op not in OPS:
+                raise ValueError(f"Unknown op {op!r} for {col}; choose from {OPS}")
+    cols = list(options)
+    return [dict(zip(cols, combo)) for combo in itertools.product(*(options[c] for c in cols))]
+
+def feature_bounds(df: pd.DataFrame, cols: list[str]) -> dict[str, tuple[float, float]]:
+    """Valid (min, max) per column: the SCHEMA range where declared, else the
+    observed range in `df` (pass the full table, not a cohort)."""
+    bounds = {}
+    for col in cols:
+        kind, lo, hi = SCHEMA.get(col, (None, None, None))
+        if kind != "numeric":
+            values = pd.to_numeric(df[col], errors="coerce") if col in df.columns else pd.Series(dtype=float)
+            lo, hi = values.min(), values.max()
+        bounds[col] = (-np.inf if lo is None or pd.isna(lo) else float(lo),
+                       np.inf if hi is None or pd.isna(hi) else float(hi))
+    return bounds
+
+def _features(model) -> list[str]:
+    return list(getattr(model, "feature_names_in_", []))
+
+def _change_arrays(scenarios: list[dict], cols: list[str]):
+    # Per-scenario affine change x*mul + add, overridden where set_mask is True
+    pos = {c: i for i, c in enumerate(cols)}
+    shape = (len(scenarios), len(cols))
+    add, mul = np.zeros(shape), np.ones(shape)
+    set_mask, set_val = np.zeros(shape, dtype=bool), np.zeros(shape)
+    for s, scenario in enumerate(scenarios):
+        for col, (op, value) in scenario.items():
+            if col not in pos:
+                continue  # feature not used by either model
+            j = pos[col]
+            if op == "add":
+                add[s, j] += value
+            elif op == "mul":
+                mul[s, j] *= value
+            else:
+                set_mask[s, j], set_val[s, j] = True, value
+    return add, mul, set_mask, set_val
+
+def score_scenarios(base: pd.DataFrame, scenarios: list[dict], classifier=None, regressor=None,
+                    clip: bool = True, bounds: dict[str, tuple[float, float]] | None = None,
+                    max_cells: int = MAX_CELLS) -> pd.DataFrame:
+    """Mean pass probability / predicted G3 per scenario and the delta vs. the unchanged cohort.
+
+    With `clip`, ``add``/``mul`` results stay inside `bounds` (default:
+    feature_bounds of `base`; the app passes the full table's) and
+    integer-valued columns are rounded (studytime 1-4 stays an integer in 1-4).
+    ``set`` values are used as given.
+    """
+    if classifier is None and regressor is None:
+        raise ValueError("Train a classifier or regressor first")
+    cols = list(dict.fromkeys(_features(classifier) + _features(regressor)))
+    missing = [c for c in cols if c not in base.columns]
+    if missing:
+        raise KeyError(f"Cohort is missing model features: {missing}")
+    X0 = base[cols].dropna().to_numpy(dtype="float64")
+    n, f = X0.shape
+    if n == 0:
+        raise ValueError("No students in the base cohort")
+
+    # Scenario 0 is the unchanged cohort, so base and scenarios share one batch
+    all_scenarios = [{}] + list(scenarios)
+    add, mul, set_mask, set_val = _change_arrays(all_scenarios, cols)
+    bounds = {**feature_bounds(base, cols), **(bounds or {})}
+    lo = np.array([bounds[c][0] for c in cols])
+    hi = np.array([bounds[c][1] for c in cols])
+    integral = np.flatnonzero(np.all(X0 == np.round(X0), axis=0))
+
+    clf_idx = [cols.index(c) for c in _features(classifier)]
+    reg_idx = [cols.index(c) for c in _features(regressor)]
+    if classifier is not None:
+        pass_col = list(classifier.classes_).index(1) if 1 in classifier.classes_ else -1
+    pass_rate, mean_pred = [], []
+    step = max(1, max_cells // max(1, n * f))
+    buf = np.empty((min(step, len(all_scenarios)), n, f))
+    for start in range(0, len(all_scenarios), step):
+        sl = slice(start, start + step)
+        S = len(add[sl])
+        # (S, 1, f) changes broadcast against (1, n, f) students -> (S, n, f), in place
+        X = buf[:S]
+        np.multiply(X0[None], mul[sl, None, :], out=X)
+        np.add(X, add[sl, None, :], out=X)
+        if clip:
+            np.clip(X, lo, hi, out=X)
+            for j in integral:
+                np.round(X[..., j], out=X[..., j])
+        np.copyto(X, set_val[sl, None, :], where=set_mask[sl, None, :])
+        flat = X.reshape(S * n, f)
+        if classifier is not None:
+            Xc = flat if clf_idx == list(range(f)) else flat[:, clf_idx]
+            proba = classifier.predict_proba(pd.DataFrame(Xc, columns=_features(classifier), copy=False))
+            pass_rate.append(proba[:, pass_col].reshape(S, n).mean(axis=1))
+        if regressor is not None:
+            Xr = flat if reg_idx == list(range(f)) else flat[:, reg_idx]
+            pred = regressor.predict(pd.DataFrame(Xr, columns=_features(regressor), copy=False))
+            mean_pred.append(pred.reshape(S, n).mean(axis=1))
+
+    names = ["(baseline)"] + [", ".join(describe_change(c, *ch) for c, ch in sc.items()) or "(no change)"
+                              for sc in scenarios]
+    out = pd.DataFrame({"scenario": names})
+    if pass_rate:
+        rate = np.concatenate(pass_rate)
+        out["pass_rate"] = rate
+        out["pass_rate_delta"] = rate - rate[0]
+    if mean_pred:
+        pred = np.concatenate(mean_pred)
+        out["mean_G3"] = pred
+        out["G3_delta"] = pred - pred[0]
+    out["students"] = n
+    return out.set_index("scenario")
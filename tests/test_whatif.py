@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from src.whatif import feature_bounds, scenario_grid, score_scenarios
+
+class _PassIfNoFailures:
+    """Stand-in classifier: P(pass) = 1 exactly when failures == 0."""
+    feature_names_in_ = np.array(["failures", "studytime"])
+    classes_ = np.array([0, 1])
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        p = (X["failures"].to_numpy() == 0).astype(float)
+        return np.column_stack([1 - p, p])
+
+def _table() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"failures": rng.integers(0, 4, 400), "studytime": rng.integers(1, 5, 400)})
+
+def test_set_is_not_clipped_to_the_cohort_range():
+    full = _table()
+    cohort = full[full["failures"] >= 2]
+    grid = scenario_grid({"failures": [("set", 0)]})
+    out = score_scenarios(cohort, grid, classifier=_PassIfNoFailures(),
+                          bounds=feature_bounds(full, ["failures", "studytime"]))
+    assert out.loc["(baseline)", "pass_rate"] == 0.0
+    assert out.loc["failures = 0", "pass_rate"] == 1.0
+
+def test_add_is_clipped_to_the_schema_range_not_the_cohort():
+    cohort = _table().query("failures >= 2")
+    grid = scenario_grid({"failures": [("add", -2), ("add", -10)]})
+    # Without explicit bounds the SCHEMA range (failures 0-4) applies
+    out = score_scenarios(cohort, grid, classifier=_PassIfNoFailures())
+    expected = (cohort["failures"] - 2 <= 0).mean()
+    assert np.isclose(out.loc["failures -2", "pass_rate"], expected)
+    assert out.loc["failures -10", "pass_rate"] == 1.0
+
+def test_chunked_scoring_matches_one_batch():
+    cohort = _table()
+    grid = scenario_grid({"failures": [("add", -1), ("mul", 0.5), ("set", 0)],
+                          "studytime": [("add", 0), ("add", 1)]})
+    whole = score_scenarios(cohort, grid, classifier=_PassIfNoFailures())
+    chunked = score_scenarios(cohort, grid, classifier=_PassIfNoFailures(), max_cells=cohort.size)
+    pd.testing.assert_frame_equal(whole, chunked)